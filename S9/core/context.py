@@ -1,116 +1,202 @@
-# core/context.py
-
-from typing import List, Optional, Dict, Any
-from modules.memory import MemoryManager, MemoryItem
-from core.session import MultiMCP  # For dispatcher typing
-from pathlib import Path
-import yaml
-import time
-import uuid
-from datetime import datetime
-from pydantic import BaseModel
-
-class StrategyProfile(BaseModel):
-    planning_mode: str
-    exploration_mode: Optional[str] = None
-    memory_fallback_enabled: bool
-    max_steps: int
-    max_lifelines_per_step: int
-
-
-class AgentProfile:
-    def __init__(self):
-        with open("config/profiles.yaml", "r") as f:
-            config = yaml.safe_load(f)
-
-        self.name = config["agent"]["name"]
-        self.id = config["agent"]["id"]
-        self.description = config["agent"]["description"]
-
-        self.strategy = StrategyProfile(**config["strategy"])
-        self.memory_config = config["memory"]
-        self.llm_config = config["llm"]
-        self.persona = config["persona"]
-
-
-    def __repr__(self):
-        return f"<AgentProfile {self.name} ({self.strategy})>"
-
-class AgentContext:
-    """Holds all session state, user input, memory, and strategies."""
-
-    def __init__(
-        self,
-        user_input: str,
-        session_id: Optional[str] = None,
-        dispatcher: Optional[MultiMCP] = None,
-        mcp_server_descriptions: Optional[List[Any]] = None,
-    ):
-        if session_id is None:
-            today = datetime.now()
-            ts = int(time.time())
-            uid = uuid.uuid4().hex[:6]
-            session_id = f"{today.year}/{today.month:02}/{today.day:02}/session-{ts}-{uid}"
-
-        self.user_input = user_input
-        self.agent_profile = AgentProfile()
-        self.memory = MemoryManager(session_id=session_id)
-        self.session_id = self.memory.session_id
-        self.dispatcher = dispatcher  # 🆕 Added formally
-        self.mcp_server_descriptions = mcp_server_descriptions  # 🆕 Added formally
-        self.step = 0
-        self.task_progress = []  # 🆕 Will track tool executions
-        self.final_answer = None
-        
-
-        # Log session start
-        self.add_memory(MemoryItem(
-            timestamp=time.time(),
-            text=f"Started new session with input: {user_input} at {datetime.utcnow().isoformat()}",
-            type="run_metadata",
-            session_id=self.session_id,
-            tags=["run_start"],
-            user_query=user_input,
-            metadata={
-                "start_time": datetime.now().isoformat(),
-                "step": self.step
-            }
-        ))
-
-    def add_memory(self, item: MemoryItem):
-        """Add item to memory"""
-        self.memory.add(item)
-
-    def format_history_for_llm(self) -> str:
-        if not self.tool_calls:
-            return "No previous actions"
-            
-        history = []
-        for i, trace in enumerate(self.tool_calls, 1):
-            result_str = str(trace.result)
-            if i < len(self.tool_calls):  # Previous steps
-                if len(result_str) > 50:
-                    result_str = f"{result_str[:50]}... [RESPONSE TRUNCATED]"
-            # else: last step gets full result
-            
-            history.append(f"{i}. Used {trace.tool_name} with {trace.arguments}\nResult: {result_str}")
-        
-        return "\n\n".join(history)
-
-    def log_subtask(self, tool_name: str, status: str = "pending"):
-        """Log the start of a new subtask."""
-        self.task_progress.append({
-            "step": self.step,
-            "tool": tool_name,
-            "status": status,
-        })
-
-    def update_subtask_status(self, tool_name: str, status: str):
-        """Update the status of an existing subtask."""
-        for item in reversed(self.task_progress):
-            if item["tool"] == tool_name and item["step"] == self.step:
-                item["status"] = status
-                break
-
-    def __repr__(self):
-        return f"<AgentContext step={self.step}, session_id={self.session_id}>"
+# core/context.py
+
+from typing import List, Optional, Dict, Any
+from modules.memory import MemoryManager, MemoryItem
+from modules.tools import expand_tool_schema
+from core.session import MultiMCP  # For dispatcher typing
+from pathlib import Path
+import asyncio
+import functools
+import yaml
+import time
+import uuid
+from datetime import datetime
+from pydantic import BaseModel
+
+class StrategyProfile(BaseModel):
+    planning_mode: str
+    exploration_mode: Optional[str] = None
+    memory_fallback_enabled: bool
+    max_steps: int
+    max_lifelines_per_step: int
+
+
+@functools.lru_cache(maxsize=1)
+def _load_profile_config(path: str = "config/profiles.yaml") -> dict:
+    """Read and parse profiles.yaml once per process — it never changes between runs."""
+    with open(path, "r") as f:
+        return yaml.safe_load(f)
+
+
+class AgentProfile:
+    _instance: Optional["AgentProfile"] = None
+
+    def __init__(self):
+        config = _load_profile_config()
+
+        self.name = config["agent"]["name"]
+        self.id = config["agent"]["id"]
+        self.description = config["agent"]["description"]
+
+        self.strategy = StrategyProfile(**config["strategy"])
+        self.memory_config = config["memory"]
+        self.llm_config = config["llm"]
+        self.persona = config["persona"]
+
+    @classmethod
+    def instance(cls) -> "AgentProfile":
+        """Shared process-wide profile — avoids re-parsing YAML on every session."""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __repr__(self):
+        return f"<AgentProfile {self.name} ({self.strategy})>"
+
+def _new_session_id(now: datetime) -> str:
+    uid = uuid.uuid4().hex[:6]
+    return f"{now.year}/{now.month:02}/{now.day:02}/session-{int(now.timestamp())}-{uid}"
+
+
+class AgentContext:
+    """Holds all session state, user input, memory, and strategies."""
+
+    def __init__(
+        self,
+        user_input: str,
+        session_id: Optional[str] = None,
+        dispatcher: Optional[MultiMCP] = None,
+        mcp_server_descriptions: Optional[List[Any]] = None,
+        _profile: Optional[AgentProfile] = None,
+        _memory: Optional[MemoryManager] = None,
+    ):
+        # One clock read covers the session id, timestamp and iso string below.
+        now = datetime.now()
+        ts = now.timestamp()
+        iso = now.isoformat()
+
+        if session_id is None:
+            session_id = _new_session_id(now)
+
+        self.user_input = user_input
+        self.agent_profile = _profile or AgentProfile.instance()
+        self.memory = _memory or MemoryManager(session_id=session_id)
+        self.session_id = self.memory.session_id
+        self.dispatcher = dispatcher  # 🆕 Added formally
+        self.mcp_server_descriptions = mcp_server_descriptions  # 🆕 Added formally
+        self.step = 0
+        self.tool_calls = []  # ToolCallResult traces for history formatting
+        self.task_progress = []  # 🆕 Will track tool executions
+        self._task_progress_index: Dict[tuple, list] = {}  # (tool, step) → entries
+        self.final_answer = None
+        self._schema_cache: Dict[str, str] = {}  # tool_name → expanded schema text
+        
+
+        # Log session start — model_construct skips validation on this known-safe
+        # payload, and the disk write is pushed off the first perception call.
+        start_item = MemoryItem.model_construct(
+            timestamp=ts,
+            text=f"Started new session with input: {user_input} at {iso}",
+            type="run_metadata",
+            session_id=self.session_id,
+            tags=["run_start"],
+            user_query=user_input,
+            metadata={
+                "start_time": iso,
+                "step": self.step
+            }
+        )
+        self._session_start_task: Optional[asyncio.Task] = None
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.add_memory(start_item)
+        else:
+            # Deferred to the next loop tick, but kept on the loop itself:
+            # MemoryManager.add mutates items and rewrites the session file,
+            # so a worker thread could race concurrent add_tool_output calls.
+            # The stored reference keeps the task from being GC'd unrun.
+            self._session_start_task = loop.create_task(
+                self._log_session_start(start_item)
+            )
+
+    async def _log_session_start(self, item: MemoryItem):
+        self.add_memory(item)
+
+    @classmethod
+    async def create(
+        cls,
+        user_input: str,
+        session_id: Optional[str] = None,
+        dispatcher: Optional[MultiMCP] = None,
+        mcp_server_descriptions: Optional[List[Any]] = None,
+    ) -> "AgentContext":
+        """
+        Async constructor: profile load and memory init are independent I/O,
+        so run them concurrently instead of back-to-back.
+        """
+        if session_id is None:
+            session_id = _new_session_id(datetime.now())
+
+        profile, memory = await asyncio.gather(
+            asyncio.to_thread(AgentProfile.instance),
+            asyncio.to_thread(MemoryManager, session_id),
+        )
+        return cls(
+            user_input,
+            session_id=session_id,
+            dispatcher=dispatcher,
+            mcp_server_descriptions=mcp_server_descriptions,
+            _profile=profile,
+            _memory=memory,
+        )
+
+    def add_memory(self, item: MemoryItem):
+        """Add item to memory"""
+        self.memory.add(item)
+
+    def get_tool_schema(self, tool: Any) -> str:
+        """Expanded schema for one tool, cached per session (lazy discovery)."""
+        cached = self._schema_cache.get(tool.name)
+        if cached is None:
+            cached = expand_tool_schema(tool)
+            self._schema_cache[tool.name] = cached
+        return cached
+
+    def format_history_for_llm(self) -> str:
+        if not self.tool_calls:
+            return "No previous actions"
+            
+        last = len(self.tool_calls)
+        history = []
+        for i, trace in enumerate(self.tool_calls, 1):
+            result = trace.result
+            if i < last:  # Previous steps only ever show 50 chars
+                result_str = result if isinstance(result, str) else str(result)
+                if len(result_str) > 50:
+                    result_str = f"{result_str[:50]}... [RESPONSE TRUNCATED]"
+            else:  # last step gets full result
+                result_str = str(result)
+
+            history.append(f"{i}. Used {trace.tool_name} with {trace.arguments}\nResult: {result_str}")
+
+        return "\n\n".join(history)
+
+    def log_subtask(self, tool_name: str, status: str = "pending"):
+        """Log the start of a new subtask."""
+        entry = {
+            "step": self.step,
+            "tool": tool_name,
+            "status": status,
+        }
+        self.task_progress.append(entry)
+        self._task_progress_index.setdefault((tool_name, self.step), []).append(entry)
+
+    def update_subtask_status(self, tool_name: str, status: str):
+        """Update the status of an existing subtask (O(1) via the index)."""
+        entries = self._task_progress_index.get((tool_name, self.step))
+        if entries:
+            entries[-1]["status"] = status
+
+    def __repr__(self):
+        return f"<AgentContext step={self.step}, session_id={self.session_id}>"
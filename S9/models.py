@@ -1,174 +1,200 @@
-from pydantic import BaseModel, Field
-from typing import List
-
-# --- Math Tools ---
-
-class AddInput(BaseModel):
-    a: int
-    b: int
-
-class AddOutput(BaseModel):
-    result: int
-
-class SubtractInput(BaseModel):
-    a: int
-    b: int
-
-class SubtractOutput(BaseModel):
-    result: int
-
-class MultiplyInput(BaseModel):
-    a: int
-    b: int
-
-class MultiplyOutput(BaseModel):
-    result: int
-
-class SqrtInput(BaseModel):
-    a: int
-    b: int
-
-class SqrtOutput(BaseModel):
-    result: int
-
-class DivideInput(BaseModel):
-    a: int
-    b: int
-
-class DivideOutput(BaseModel):
-    result: float
-
-class PowerInput(BaseModel):
-    a: int
-    b: int
-
-class PowerOutput(BaseModel):
-    result: int
-
-class CbrtInput(BaseModel):
-    a: int
-
-class CbrtOutput(BaseModel):
-    result: float
-
-class FactorialInput(BaseModel):
-    a: int
-
-class FactorialOutput(BaseModel):
-    result: int
-
-class RemainderInput(BaseModel):
-    a: int
-    b: int
-
-class RemainderOutput(BaseModel):
-    result: int
-
-class SinInput(BaseModel):
-    a: int
-
-class SinOutput(BaseModel):
-    result: float
-
-class CosInput(BaseModel):
-    a: int
-
-class CosOutput(BaseModel):
-    result: float
-
-class TanInput(BaseModel):
-    a: int
-
-class TanOutput(BaseModel):
-    result: float
-
-class MineInput(BaseModel):
-    a: int
-    b: int
-
-class MineOutput(BaseModel):
-    result: int
-
-# --- String & List Tools ---
-
-class StringsToIntsInput(BaseModel):
-    string: str
-
-class StringsToIntsOutput(BaseModel):
-    result: List[int]
-
-
-class ExpSumInput(BaseModel):
-    numbers: List[int]
-
-class ExpSumOutput(BaseModel):
-    result: float
-
-class FibonacciInput(BaseModel):
-    n: int
-
-class FibonacciOutput(BaseModel):
-    result: List[int]
-
-# --- Image Tools ---
-
-class CreateThumbnailInput(BaseModel):
-    image_path: str
-
-class ImageOutput(BaseModel):
-    data: bytes
-    format: str
-
-# --- Shell, Python, SQL Tools ---
-
-class PythonCodeInput(BaseModel):
-    code: str
-
-class PythonCodeOutput(BaseModel):
-    result: str
-
-class ShellCommandInput(BaseModel):
-    command: str
-
-# --- RAG and Extraction Tools ---
-
-class UrlInput(BaseModel):
-    url: str
-
-class FilePathInput(BaseModel):
-    file_path: str
-
-class MarkdownInput(BaseModel):
-    text: str
-
-class MarkdownOutput(BaseModel):
-    markdown: str
-
-class ChunkListOutput(BaseModel):
-    chunks: List[str]
-
-# --- Memory Search ---
-
-class SearchMemoryInput(BaseModel):
-    query: str
-
-class EmptyInput(BaseModel):
-    pass
-
-# --- Search Tools ---
-
-class SearchInput(BaseModel):
-    query: str
-    max_results: int = Field(default=10, description="Maximum number of results to return")
-
-class SearchDocumentsInput(BaseModel):
-    query: str
-
-class UrlInput(BaseModel):
-    url: str
-
-class FilePathInput(BaseModel):
-    file_path: str
-
-class MarkdownOutput(BaseModel):
-    markdown: str
+from dataclasses import dataclass
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List
+
+
+class HotToolInput(BaseModel):
+    """
+    Base for high-frequency tool inputs. FastMCP derives schemas and
+    validation from pydantic, so the models stay pydantic, but validation
+    is kept as lean as the SDK allows for these trivially-typed payloads.
+    """
+    model_config = ConfigDict(
+        extra="ignore",
+        validate_assignment=False,
+        arbitrary_types_allowed=True,
+    )
+
+
+# --- Math Tools ---
+
+class AddInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class AddOutput:
+    result: int
+
+class SubtractInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class SubtractOutput:
+    result: int
+
+class MultiplyInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class MultiplyOutput:
+    result: int
+
+class SqrtInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class SqrtOutput:
+    result: int
+
+class DivideInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class DivideOutput:
+    result: float
+
+class PowerInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class PowerOutput:
+    result: int
+
+class CbrtInput(HotToolInput):
+    a: int
+
+@dataclass(slots=True)
+class CbrtOutput:
+    result: float
+
+class FactorialInput(HotToolInput):
+    a: int
+
+@dataclass(slots=True)
+class FactorialOutput:
+    result: int
+
+class RemainderInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class RemainderOutput:
+    result: int
+
+class SinInput(HotToolInput):
+    a: int
+
+@dataclass(slots=True)
+class SinOutput:
+    result: float
+
+class CosInput(HotToolInput):
+    a: int
+
+@dataclass(slots=True)
+class CosOutput:
+    result: float
+
+class TanInput(HotToolInput):
+    a: int
+
+@dataclass(slots=True)
+class TanOutput:
+    result: float
+
+class MineInput(HotToolInput):
+    a: int
+    b: int
+
+@dataclass(slots=True)
+class MineOutput:
+    result: int
+
+# --- String & List Tools ---
+
+class StringsToIntsInput(HotToolInput):
+    string: str
+
+@dataclass(slots=True)
+class StringsToIntsOutput:
+    result: List[int]
+
+
+class ExpSumInput(HotToolInput):
+    numbers: List[int]
+
+@dataclass(slots=True)
+class ExpSumOutput:
+    result: float
+
+class FibonacciInput(HotToolInput):
+    n: int
+
+@dataclass(slots=True)
+class FibonacciOutput:
+    result: List[int]
+
+# --- Image Tools ---
+
+class CreateThumbnailInput(BaseModel):
+    image_path: str
+
+@dataclass(slots=True)
+class ImageOutput:
+    data: bytes
+    format: str
+
+# --- Shell, Python, SQL Tools ---
+
+class PythonCodeInput(BaseModel):
+    code: str
+
+@dataclass(slots=True)
+class PythonCodeOutput:
+    result: str
+
+class ShellCommandInput(BaseModel):
+    command: str
+
+# --- RAG and Extraction Tools ---
+
+class UrlInput(BaseModel):
+    url: str
+
+class FilePathInput(BaseModel):
+    file_path: str
+
+class MarkdownInput(BaseModel):
+    text: str
+
+@dataclass(slots=True)
+class MarkdownOutput:
+    markdown: str
+
+@dataclass(slots=True)
+class ChunkListOutput:
+    chunks: List[str]
+
+# --- Memory Search ---
+
+class SearchMemoryInput(BaseModel):
+    query: str
+
+class EmptyInput(BaseModel):
+    pass
+
+# --- Search Tools ---
+
+class SearchInput(HotToolInput):
+    query: str
+    max_results: int = Field(default=10, description="Maximum number of results to return")
+
+class SearchDocumentsInput(BaseModel):
+    query: str
@@ -1,84 +1,121 @@
-# modules/action.py
-
-from typing import Dict, Any, Union
-from pydantic import BaseModel
-import asyncio
-import types
-import json
-
-
-# Optional logging fallback
-try:
-    from agent import log
-except ImportError:
-    import datetime
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[{now}] [{stage}] {msg}")
-
-class ToolCallResult(BaseModel):
-    tool_name: str
-    arguments: Dict[str, Any]
-    result: Union[str, list, dict]
-    raw_response: Any
-
-MAX_TOOL_CALLS_PER_PLAN = 5
-
-async def run_python_sandbox(code: str, dispatcher: Any) -> str:
-    print("[action] 🔍 Entered run_python_sandbox()")
-
-    # Create a fresh module scope
-    sandbox = types.ModuleType("sandbox")
-
-    try:
-        # Patch MCP client with real dispatcher
-        class SandboxMCP:
-            def __init__(self, dispatcher):
-                self.dispatcher = dispatcher
-                self.call_count = 0
-
-            async def call_tool(self, tool_name: str, input_dict: dict):
-                self.call_count += 1
-                if self.call_count > MAX_TOOL_CALLS_PER_PLAN:
-                    raise RuntimeError(f"Exceeded max tool calls ({MAX_TOOL_CALLS_PER_PLAN}) in solve() plan.")
-                # REAL tool call now
-                result = await self.dispatcher.call_tool(tool_name, input_dict)
-                return result
-
-        sandbox.mcp = SandboxMCP(dispatcher)
-
-        # Preload safe built-ins into the sandbox
-        import json, re
-        sandbox.__dict__["json"] = json
-        sandbox.__dict__["re"] = re
-
-        # Execute solve fn dynamically
-        exec(compile(code, "<solve_plan>", "exec"), sandbox.__dict__)
-
-        solve_fn = sandbox.__dict__.get("solve")
-        if solve_fn is None:
-            raise ValueError("No solve() function found in plan.")
-
-        if asyncio.iscoroutinefunction(solve_fn):
-            result = await solve_fn()
-        else:
-            result = solve_fn()
-
-        # Clean result formatting
-        if isinstance(result, dict) and "result" in result:
-            return f"{result['result']}"
-        elif isinstance(result, dict):
-            return f"{json.dumps(result)}"
-        elif isinstance(result, list):
-            return f"{' '.join(str(r) for r in result)}"
-        else:
-            return f"{result}"
-
-
-
-
-
-
-    except Exception as e:
-        log("sandbox", f"⚠️ Execution error: {e}")
-        return f"[sandbox error: {str(e)}]"
+# modules/action.py
+
+from typing import Dict, Any, Union
+from pydantic import BaseModel
+from modules import json_fast
+import asyncio
+import json
+import re
+
+
+# Optional logging fallback
+try:
+    from agent import log
+except ImportError:
+    import time
+    def log(stage: str, msg: str):
+        # time.strftime on the C struct tm is cheaper than datetime+strftime
+        print(f"[{time.strftime('%H:%M:%S')}] [{stage}] {msg}")
+
+class ToolCallResult(BaseModel):
+    tool_name: str
+    arguments: Dict[str, Any]
+    result: Union[str, list, dict]
+    raw_response: Any
+
+MAX_TOOL_CALLS_PER_PLAN = 5
+
+# Retries often re-execute an identical plan; cache its compiled code object
+_COMPILE_CACHE: Dict[str, Any] = {}
+_COMPILE_CACHE_MAX = 32
+
+
+def _compile_plan(code: str):
+    compiled = _COMPILE_CACHE.get(code)
+    if compiled is None:
+        compiled = compile(code, "<solve_plan>", "exec")
+        if len(_COMPILE_CACHE) >= _COMPILE_CACHE_MAX:
+            _COMPILE_CACHE.pop(next(iter(_COMPILE_CACHE)))
+        _COMPILE_CACHE[code] = compiled
+    return compiled
+
+def ascii_of(s: str) -> list:
+    """Character codes of a string, computed locally. Plans can use this
+    instead of a strings_to_chars_to_int round trip when the values are
+    only needed as input to another tool."""
+    if s.isascii():
+        # C-level fast path: encode + list() instead of N Python ord() calls
+        return list(s.encode("ascii"))
+    return [ord(char) for char in s]
+
+
+# Safe built-ins shared by every sandbox run; exec only needs a dict, so a
+# fresh ModuleType per call was pure allocation churn.
+_BASE_SANDBOX_GLOBALS = {"json": json, "re": re, "ascii_of": ascii_of}
+
+
+async def run_python_sandbox(code: str, dispatcher: Any) -> str:
+    print("[action] 🔍 Entered run_python_sandbox()")
+
+    # Fresh globals dict per call, seeded from the shared template
+    sandbox_globals = dict(_BASE_SANDBOX_GLOBALS)
+
+    try:
+        # Patch MCP client with real dispatcher
+        class SandboxMCP:
+            def __init__(self, dispatcher):
+                self.dispatcher = dispatcher
+                self.call_count = 0
+
+            async def call_tool(self, tool_name: str, input_dict: dict):
+                self.call_count += 1
+                if self.call_count > MAX_TOOL_CALLS_PER_PLAN:
+                    raise RuntimeError(f"Exceeded max tool calls ({MAX_TOOL_CALLS_PER_PLAN}) in solve() plan.")
+                # REAL tool call now
+                result = await self.dispatcher.call_tool(tool_name, input_dict)
+                return result
+
+            async def call_tools_parallel(self, calls: list):
+                """Dispatch independent tool calls concurrently.
+                calls: list of (tool_name, input_dict) pairs. Results are
+                returned in the same order. Each call still counts against
+                the per-plan budget."""
+                self.call_count += len(calls)
+                if self.call_count > MAX_TOOL_CALLS_PER_PLAN:
+                    raise RuntimeError(f"Exceeded max tool calls ({MAX_TOOL_CALLS_PER_PLAN}) in solve() plan.")
+                return await asyncio.gather(
+                    *(self.dispatcher.call_tool(tool_name, input_dict) for tool_name, input_dict in calls)
+                )
+
+        sandbox_globals["mcp"] = SandboxMCP(dispatcher)
+
+        # Execute solve fn dynamically (compiled once per distinct plan)
+        exec(_compile_plan(code), sandbox_globals)
+
+        solve_fn = sandbox_globals.get("solve")
+        if solve_fn is None:
+            raise ValueError("No solve() function found in plan.")
+
+        if asyncio.iscoroutinefunction(solve_fn):
+            result = await solve_fn()
+        else:
+            result = solve_fn()
+
+        # Clean result formatting
+        if isinstance(result, dict) and "result" in result:
+            return f"{result['result']}"
+        elif isinstance(result, dict):
+            return json_fast.dumps(result)
+        elif isinstance(result, list):
+            return f"{' '.join(str(r) for r in result)}"
+        else:
+            return f"{result}"
+
+
+
+
+
+
+    except Exception as e:
+        log("sandbox", f"⚠️ Execution error: {e}")
+        return f"[sandbox error: {str(e)}]"
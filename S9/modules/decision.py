@@ -1,63 +1,87 @@
-from typing import List, Optional
-from modules.perception import PerceptionResult
-from modules.memory import MemoryItem
-from modules.model_manager import ModelManager
-from modules.tools import load_prompt
-import re
-
-# Optional logging fallback
-try:
-    from agent import log
-except ImportError:
-    import datetime
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[{now}] [{stage}] {msg}")
-
-model = ModelManager()
-
-
-# prompt_path = "prompts/decision_prompt.txt"
-
-async def generate_plan(
-    user_input: str, 
-    perception: PerceptionResult,
-    memory_items: List[MemoryItem],
-    tool_descriptions: Optional[str],
-    prompt_path: str,
-    step_num: int = 1,
-    max_steps: int = 3,
-) -> str:
-
-    """Generates the full solve() function plan for the agent."""
-
-    memory_texts = "\n".join(f"- {m.text}" for m in memory_items) or "None"
-
-    prompt_template = load_prompt(prompt_path)
-
-    prompt = prompt_template.format(
-        tool_descriptions=tool_descriptions,
-        user_input=user_input
-    )
-
-
-    try:
-        raw = (await model.generate_text(prompt)).strip()
-        log("plan", f"LLM output: {raw}")
-
-        # If fenced in ```python ... ```, extract
-        if raw.startswith("```"):
-            raw = raw.strip("`").strip()
-            if raw.lower().startswith("python"):
-                raw = raw[len("python"):].strip()
-
-        if re.search(r"^\s*(async\s+)?def\s+solve\s*\(", raw, re.MULTILINE):
-            return raw  # ✅ Correct, it's a full function
-        else:
-            log("plan", "⚠️ LLM did not return a valid solve(). Defaulting to FINAL_ANSWER")
-            return "FINAL_ANSWER: [Could not generate valid solve()]"
-
-
-    except Exception as e:
-        log("plan", f"⚠️ Planning failed: {e}")
-        return "FINAL_ANSWER: [unknown]"
+from typing import List, Optional
+from modules.perception import PerceptionResult
+from modules.memory import MemoryItem
+from modules.model_manager import ModelManager
+from modules.tools import load_prompt
+import re
+
+# Precompiled once — checked against every LLM plan output
+_SOLVE_RE = re.compile(r"^\s*(async\s+)?def\s+solve\s*\(", re.MULTILINE)
+
+# Optional logging fallback
+try:
+    from agent import log
+except ImportError:
+    import time
+    def log(stage: str, msg: str):
+        # time.strftime on the C struct tm is cheaper than datetime+strftime
+        print(f"[{time.strftime('%H:%M:%S')}] [{stage}] {msg}")
+
+model = ModelManager()
+
+
+# prompt_path = "prompts/decision_prompt.txt"
+
+async def generate_plan(
+    user_input: str, 
+    perception: PerceptionResult,
+    memory_items: List[MemoryItem],
+    tool_descriptions: Optional[str],
+    prompt_path: str,
+    step_num: int = 1,
+    max_steps: int = 3,
+    refresh: bool = False,
+) -> str:
+
+    """Generates the full solve() function plan for the agent."""
+
+    memory_texts = "\n".join(f"- {m.text}" for m in memory_items) or "None"
+
+    prompt_template = load_prompt(prompt_path)
+
+    prompt = prompt_template.format(
+        tool_descriptions=tool_descriptions,
+        user_input=user_input
+    )
+
+
+    try:
+        # Stream the response so the solve() signature check can fire while
+        # the model is still generating the function body.
+        buffer: List[str] = []
+        solve_seen = False
+
+        def on_chunk(chunk: str):
+            nonlocal solve_seen
+            buffer.append(chunk)
+            if not solve_seen and "def solve" in chunk and _SOLVE_RE.search("".join(buffer)):
+                solve_seen = True
+                log("plan", "solve() signature detected mid-stream")
+
+        # The prompt embeds tool_descriptions and the (possibly overridden)
+        # user input; the rest of the plan-shaping context rides in the key
+        # so different steps of one task never collide on a cached plan.
+        cache_key = (perception.tool_hint, step_num, max_steps)
+
+        raw = (await model.generate_text_cached(
+            prompt, stream_callback=on_chunk, refresh=refresh, extra_key=cache_key
+        )).strip()
+        log("plan", f"LLM output: {raw}")
+
+        # If fenced in ```python ... ```, extract
+        if raw.startswith("```"):
+            raw = raw.strip("`").strip()
+            if raw.lower().startswith("python"):
+                raw = raw[len("python"):].strip()
+
+        if _SOLVE_RE.search(raw):
+            return raw  # ✅ Correct, it's a full function
+        else:
+            log("plan", "⚠️ LLM did not return a valid solve(). Defaulting to FINAL_ANSWER")
+            model.forget(prompt, cache_key)  # never serve an invalid plan from cache
+            return "FINAL_ANSWER: [Could not generate valid solve()]"
+
+
+    except Exception as e:
+        log("plan", f"⚠️ Planning failed: {e}")
+        return "FINAL_ANSWER: [unknown]"
@@ -0,0 +1,32 @@
+# modules/json_fast.py
+
+"""
+orjson-backed dumps/loads for the hot JSON call sites (tool results,
+memory files, MCP payloads). Falls back to stdlib json if orjson is
+missing so scripts stay runnable in a bare environment.
+"""
+
+import json as _json
+
+try:
+    import orjson as _orjson
+except ImportError:
+    _orjson = None
+
+
+if _orjson is not None:
+    def dumps(obj) -> str:
+        """Serialize obj to a JSON string. Unusual types fall back to str()."""
+        return _orjson.dumps(obj, default=str, option=_orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return _orjson.loads(data)
+else:
+    def dumps(obj) -> str:
+        """Serialize obj to a JSON string. Unusual types fall back to str()."""
+        return _json.dumps(obj, default=str)
+
+    def loads(data):
+        """Parse JSON from str or bytes."""
+        return _json.loads(data)
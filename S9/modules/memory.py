@@ -1,133 +1,145 @@
-# modules/memory.py
-
-import json
-import os
-import time
-from typing import List, Optional
-from pydantic import BaseModel
-
-# Optional fallback logger
-try:
-    from agent import log
-except ImportError:
-    import datetime
-    def log(stage: str, msg: str):
-        now = datetime.datetime.now().strftime("%H:%M:%S")
-        print(f"[{now}] [{stage}] {msg}")
-
-class MemoryItem(BaseModel):
-    """Represents a single memory entry for a session."""
-    timestamp: float
-    type: str  # run_metadata, tool_call, tool_output, final_answer
-    text: str
-    tool_name: Optional[str] = None
-    tool_args: Optional[dict] = None
-    tool_result: Optional[dict] = None
-    final_answer: Optional[str] = None
-    tags: Optional[List[str]] = []
-    success: Optional[bool] = None
-    metadata: Optional[dict] = {}  # ✅ ADD THIS LINE BACK
-
-
-class MemoryManager:
-    """Manages session memory (read/write/append)."""
-
-    def __init__(self, session_id: str, memory_dir: str = "memory"):
-        self.session_id = session_id
-        self.memory_dir = memory_dir
-        self.memory_path = os.path.join('memory', session_id.split('-')[0], session_id.split('-')[1], session_id.split('-')[2], f'session-{session_id}.json')
-        self.items: List[MemoryItem] = []
-
-        if not os.path.exists(self.memory_dir):
-            os.makedirs(self.memory_dir)
-
-        self.load()
-
-    def load(self):
-        if os.path.exists(self.memory_path):
-            with open(self.memory_path, "r", encoding="utf-8") as f:
-                raw = json.load(f)
-                self.items = [MemoryItem(**item) for item in raw]
-        else:
-            self.items = []
-
-    def save(self):
-        # Before opening the file for writing
-        os.makedirs(os.path.dirname(self.memory_path), exist_ok=True)
-        with open(self.memory_path, "w", encoding="utf-8") as f:
-            raw = [item.dict() for item in self.items]
-            json.dump(raw, f, indent=2)
-
-    def add(self, item: MemoryItem):
-        self.items.append(item)
-        self.save()
-
-    def add_tool_call(
-        self, tool_name: str, tool_args: dict, tags: Optional[List[str]] = None
-    ):
-        item = MemoryItem(
-            timestamp=time.time(),
-            type="tool_call",
-            text=f"Called {tool_name} with {tool_args}",
-            tool_name=tool_name,
-            tool_args=tool_args,
-            tags=tags or [],
-        )
-        self.add(item)
-
-    def add_tool_output(
-        self, tool_name: str, tool_args: dict, tool_result: dict, success: bool, tags: Optional[List[str]] = None
-    ):
-        item = MemoryItem(
-            timestamp=time.time(),
-            type="tool_output",
-            text=f"Output of {tool_name}: {tool_result}",
-            tool_name=tool_name,
-            tool_args=tool_args,
-            tool_result=tool_result,
-            success=success,  # 🆕 Track success!
-            tags=tags or [],
-        )
-        self.add(item)
-
-    def add_final_answer(self, text: str):
-        item = MemoryItem(
-            timestamp=time.time(),
-            type="final_answer",
-            text=text,
-            final_answer=text,
-        )
-        self.add(item)
-
-    def find_recent_successes(self, limit: int = 5) -> List[str]:
-        """Find tool names which succeeded recently."""
-        tool_successes = []
-
-        # Search from newest to oldest
-        for item in reversed(self.items):
-            if item.type == "tool_output" and item.success:
-                if item.tool_name and item.tool_name not in tool_successes:
-                    tool_successes.append(item.tool_name)
-            if len(tool_successes) >= limit:
-                break
-
-        return tool_successes
-
-    def add_tool_success(self, tool_name: str, success: bool):
-        """Patch last tool call or output for a given tool with success=True/False."""
-
-        # Search backwards for latest matching tool call/output
-        for item in reversed(self.items):
-            if item.tool_name == tool_name and item.type in {"tool_call", "tool_output"}:
-                item.success = success
-                log("memory", f"✅ Marked {tool_name} as success={success}")
-                self.save()
-                return
-
-        log("memory", f"⚠️ Tried to mark {tool_name} as success={success} but no matching memory found.")
-
-    def get_session_items(self) -> List[MemoryItem]:
-        """
-        Return all memory items for current session.
-        """
-        return self.items
+# modules/memory.py
+
+import json
+import os
+import time
+from collections import deque
+from typing import List, Optional
+from pydantic import BaseModel
+
+# Optional fallback logger
+try:
+    from agent import log
+except ImportError:
+    import time
+    def log(stage: str, msg: str):
+        # time.strftime on the C struct tm is cheaper than datetime+strftime
+        print(f"[{time.strftime('%H:%M:%S')}] [{stage}] {msg}")
+
+class MemoryItem(BaseModel):
+    """Represents a single memory entry for a session."""
+    timestamp: float
+    type: str  # run_metadata, tool_call, tool_output, final_answer
+    text: str
+    tool_name: Optional[str] = None
+    tool_args: Optional[dict] = None
+    tool_result: Optional[dict] = None
+    final_answer: Optional[str] = None
+    tags: Optional[List[str]] = []
+    success: Optional[bool] = None
+    metadata: Optional[dict] = {}  # ✅ ADD THIS LINE BACK
+
+
+class MemoryManager:
+    """Manages session memory (read/write/append)."""
+
+    def __init__(self, session_id: str, memory_dir: str = "memory"):
+        self.session_id = session_id
+        self.memory_dir = memory_dir
+        self.memory_path = os.path.join('memory', session_id.split('-')[0], session_id.split('-')[1], session_id.split('-')[2], f'session-{session_id}.json')
+        self.items: List[MemoryItem] = []
+        # Incremental index of successful tool names (newest last) so fallback
+        # planning doesn't rescan the whole memory list.
+        self._recent_successes: deque = deque(maxlen=50)
+
+        if not os.path.exists(self.memory_dir):
+            os.makedirs(self.memory_dir)
+
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.memory_path):
+            with open(self.memory_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+                self.items = [MemoryItem(**item) for item in raw]
+            for item in self.items:
+                self._index_success(item)
+        else:
+            self.items = []
+
+    def _index_success(self, item: MemoryItem):
+        """Record a successful tool output in the incremental index."""
+        if item.type == "tool_output" and item.success and item.tool_name:
+            self._recent_successes.append(item.tool_name)
+
+    def save(self):
+        # Before opening the file for writing
+        os.makedirs(os.path.dirname(self.memory_path), exist_ok=True)
+        with open(self.memory_path, "w", encoding="utf-8") as f:
+            raw = [item.dict() for item in self.items]
+            json.dump(raw, f, indent=2)
+
+    def add(self, item: MemoryItem):
+        self.items.append(item)
+        self._index_success(item)
+        self.save()
+
+    def add_tool_call(
+        self, tool_name: str, tool_args: dict, tags: Optional[List[str]] = None
+    ):
+        item = MemoryItem(
+            timestamp=time.time(),
+            type="tool_call",
+            text=f"Called {tool_name} with {tool_args}",
+            tool_name=tool_name,
+            tool_args=tool_args,
+            tags=tags or [],
+        )
+        self.add(item)
+
+    def add_tool_output(
+        self, tool_name: str, tool_args: dict, tool_result: dict, success: bool, tags: Optional[List[str]] = None
+    ):
+        item = MemoryItem(
+            timestamp=time.time(),
+            type="tool_output",
+            text=f"Output of {tool_name}: {tool_result}",
+            tool_name=tool_name,
+            tool_args=tool_args,
+            tool_result=tool_result,
+            success=success,  # 🆕 Track success!
+            tags=tags or [],
+        )
+        self.add(item)
+
+    def add_final_answer(self, text: str):
+        item = MemoryItem(
+            timestamp=time.time(),
+            type="final_answer",
+            text=text,
+            final_answer=text,
+        )
+        self.add(item)
+
+    def find_recent_successes(self, limit: int = 5) -> List[str]:
+        """Find tool names which succeeded recently — O(limit) via the index."""
+        tool_successes = []
+
+        # Index holds names newest-last; walk backwards and de-dupe
+        for tool_name in reversed(self._recent_successes):
+            if tool_name not in tool_successes:
+                tool_successes.append(tool_name)
+            if len(tool_successes) >= limit:
+                break
+
+        return tool_successes
+
+    def add_tool_success(self, tool_name: str, success: bool):
+        """Patch last tool call or output for a given tool with success=True/False."""
+
+        # Search backwards for latest matching tool call/output
+        for item in reversed(self.items):
+            if item.tool_name == tool_name and item.type in {"tool_call", "tool_output"}:
+                item.success = success
+                self._index_success(item)
+                log("memory", f"✅ Marked {tool_name} as success={success}")
+                self.save()
+                return
+
+        log("memory", f"⚠️ Tried to mark {tool_name} as success={success} but no matching memory found.")
+
+    def get_session_items(self) -> List[MemoryItem]:
+        """
+        Return all memory items for current session.
+        """
+        return self.items
@@ -1,59 +1,143 @@
-import os
-import json
-import yaml
-import requests
-from pathlib import Path
-from google import genai
-from dotenv import load_dotenv
-
-load_dotenv()
-
-ROOT = Path(__file__).parent.parent
-MODELS_JSON = ROOT / "config" / "models.json"
-PROFILE_YAML = ROOT / "config" / "profiles.yaml"
-
-class ModelManager:
-    def __init__(self):
-        self.config = json.loads(MODELS_JSON.read_text())
-        self.profile = yaml.safe_load(PROFILE_YAML.read_text())
-
-        self.text_model_key = self.profile["llm"]["text_generation"]
-        self.model_info = self.config["models"][self.text_model_key]
-        self.model_type = self.model_info["type"]
-
-        # ✅ Gemini initialization (your style)
-        if self.model_type == "gemini":
-            api_key = os.getenv("GEMINI_API_KEY")
-            self.client = genai.Client(api_key=api_key)
-
-    async def generate_text(self, prompt: str) -> str:
-        if self.model_type == "gemini":
-            return self._gemini_generate(prompt)
-
-        elif self.model_type == "ollama":
-            return self._ollama_generate(prompt)
-
-        raise NotImplementedError(f"Unsupported model type: {self.model_type}")
-
-    def _gemini_generate(self, prompt: str) -> str:
-        response = self.client.models.generate_content(
-            model=self.model_info["model"],
-            contents=prompt
-        )
-
-        # ✅ Safely extract response text
-        try:
-            return response.text.strip()
-        except AttributeError:
-            try:
-                return response.candidates[0].content.parts[0].text.strip()
-            except Exception:
-                return str(response)
-
-    def _ollama_generate(self, prompt: str) -> str:
-        response = requests.post(
-            self.model_info["url"]["generate"],
-            json={"model": self.model_info["model"], "prompt": prompt, "stream": False}
-        )
-        response.raise_for_status()
-        return response.json()["response"].strip()
+import os
+import hashlib
+import json
+import yaml
+import requests
+from collections import OrderedDict
+from pathlib import Path
+from google import genai
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROOT = Path(__file__).parent.parent
+MODELS_JSON = ROOT / "config" / "models.json"
+PROFILE_YAML = ROOT / "config" / "profiles.yaml"
+
+_RESPONSE_CACHE_SIZE = 64
+
+
+class ModelManager:
+    def __init__(self):
+        self._response_cache: OrderedDict = OrderedDict()  # prompt hash → text
+        self.config = json.loads(MODELS_JSON.read_text())
+        self.profile = yaml.safe_load(PROFILE_YAML.read_text())
+
+        self.text_model_key = self.profile["llm"]["text_generation"]
+        self.model_info = self.config["models"][self.text_model_key]
+        self.model_type = self.model_info["type"]
+
+        # ✅ Gemini initialization (your style)
+        if self.model_type == "gemini":
+            api_key = os.getenv("GEMINI_API_KEY")
+            self.client = genai.Client(api_key=api_key)
+
+    async def generate_text(self, prompt: str) -> str:
+        if self.model_type == "gemini":
+            return self._gemini_generate(prompt)
+
+        elif self.model_type == "ollama":
+            return self._ollama_generate(prompt)
+
+        raise NotImplementedError(f"Unsupported model type: {self.model_type}")
+
+    async def generate_text_stream(self, prompt: str):
+        """
+        Async iterator over response chunks, so callers can start
+        post-processing while the model is still generating.
+        """
+        if self.model_type == "gemini":
+            for chunk in self.client.models.generate_content_stream(
+                model=self.model_info["model"],
+                contents=prompt
+            ):
+                text = getattr(chunk, "text", None)
+                if text:
+                    yield text
+
+        elif self.model_type == "ollama":
+            with requests.post(
+                self.model_info["url"]["generate"],
+                json={"model": self.model_info["model"], "prompt": prompt, "stream": True},
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+                for line in response.iter_lines():
+                    if line:
+                        chunk = json.loads(line).get("response")
+                        if chunk:
+                            yield chunk
+
+        else:
+            # No streaming support — fall back to one full-response chunk
+            yield await self.generate_text(prompt)
+
+    @staticmethod
+    def _cache_key(prompt: str, extra_key: tuple = ()) -> bytes:
+        """Hash of the prompt plus any context not embedded in its text
+        (step number, perception hints, …) that should still shape a hit."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(prompt.encode("utf-8"))
+        for part in extra_key:
+            h.update(b"\x00")
+            h.update(str(part).encode("utf-8"))
+        return h.digest()
+
+    def forget(self, prompt: str, extra_key: tuple = ()):
+        """Drop the cached response for a prompt (e.g. it produced a bad plan)."""
+        self._response_cache.pop(self._cache_key(prompt, extra_key), None)
+
+    async def generate_text_cached(self, prompt: str, stream_callback=None,
+                                   refresh: bool = False,
+                                   extra_key: tuple = ()) -> str:
+        """
+        generate_text memoized on the exact prompt plus extra_key. Retry
+        lifelines often resend unchanged inputs; a hit skips the full LLM
+        round trip. When stream_callback is given, the response is streamed
+        and the callback sees each chunk as it arrives (cache hits skip it).
+        refresh=True bypasses the lookup and resamples the model — retries
+        after a failure must not replay the answer that just failed.
+        """
+        key = self._cache_key(prompt, extra_key)
+        if not refresh:
+            cached = self._response_cache.get(key)
+            if cached is not None:
+                self._response_cache.move_to_end(key)
+                return cached
+
+        if stream_callback is None:
+            text = await self.generate_text(prompt)
+        else:
+            parts = []
+            async for chunk in self.generate_text_stream(prompt):
+                parts.append(chunk)
+                stream_callback(chunk)
+            text = "".join(parts)
+
+        self._response_cache[key] = text
+        if len(self._response_cache) > _RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+        return text
+
+    def _gemini_generate(self, prompt: str) -> str:
+        response = self.client.models.generate_content(
+            model=self.model_info["model"],
+            contents=prompt
+        )
+
+        # ✅ Safely extract response text
+        try:
+            return response.text.strip()
+        except AttributeError:
+            try:
+                return response.candidates[0].content.parts[0].text.strip()
+            except Exception:
+                return str(response)
+
+    def _ollama_generate(self, prompt: str) -> str:
+        response = requests.post(
+            self.model_info["url"]["generate"],
+            json={"model": self.model_info["model"], "prompt": prompt, "stream": False}
+        )
+        response.raise_for_status()
+        return response.json()["response"].strip()
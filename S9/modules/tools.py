@@ -1,53 +1,85 @@
-# modules/tools.py
-
-from typing import List, Dict, Optional, Any
-import re
-
-def extract_json_block(text: str) -> str:
-    match = re.search(r"```json\n(.*?)```", text, re.DOTALL)
-    if match:
-        return match.group(1).strip()
-    return text.strip()
-
-
-def summarize_tools(tools: List[Any]) -> str:
-    """
-    Generate a string summary of tools for LLM prompt injection.
-    Format: "- tool_name: description"
-    """
-    return "\n".join(
-        f"- {tool.name}: {getattr(tool, 'description', 'No description provided.')}"
-        for tool in tools
-    )
-
-
-def filter_tools_by_hint(tools: List[Any], hint: Optional[str] = None) -> List[Any]:
-    """
-    If tool_hint is provided (e.g., 'search_documents'),
-    try to match it exactly or fuzzily with available tool names.
-    """
-    if not hint:
-        return tools
-
-    hint_lower = hint.lower()
-    filtered = [tool for tool in tools if hint_lower in tool.name.lower()]
-    return filtered if filtered else tools
-
-
-def get_tool_map(tools: List[Any]) -> Dict[str, Any]:
-    """
-    Return a dict of tool_name → tool object for fast lookup
-    """
-    return {tool.name: tool for tool in tools}
-
-def tool_expects_input(self, tool_name: str) -> bool:
-    tool = next((t for t in self.tools if t.name == tool_name), None)
-    if not tool or not hasattr(tool, 'parameters') or not isinstance(tool.parameters, dict):
-        return False
-    # If the top-level parameter is just 'input', we assume wrapping is required
-    return list(tool.parameters.keys()) == ['input']
-
-
-def load_prompt(path: str) -> str:
-    with open(path, "r", encoding="utf-8") as f:
-        return f.read()
+# modules/tools.py
+
+from typing import List, Dict, Optional, Any
+import functools
+import json
+import re
+
+_JSON_BLOCK_RE = re.compile(r"```json\n(.*?)```", re.DOTALL)
+
+
+def extract_json_block(text: str) -> str:
+    match = _JSON_BLOCK_RE.search(text)
+    if match:
+        return match.group(1).strip()
+    return text.strip()
+
+
+# Tool objects are unhashable, but their names/descriptions are stable within a
+# process, so summaries can be memoized by the tuple of tool names.
+_SUMMARY_CACHE: Dict[tuple, str] = {}
+
+
+def summarize_tools(tools: List[Any]) -> str:
+    """
+    Generate a string summary of tools for LLM prompt injection.
+    Format: "- tool_name: description"
+    Cached per unique tool-name tuple — the loop re-summarizes the same
+    selection every lifeline of every step otherwise.
+    """
+    key = tuple(tool.name for tool in tools)
+    summary = _SUMMARY_CACHE.get(key)
+    if summary is None:
+        summary = "\n".join(
+            f"- {tool.name}: {getattr(tool, 'description', 'No description provided.')}"
+            for tool in tools
+        )
+        _SUMMARY_CACHE[key] = summary
+    return summary
+
+
+def expand_tool_schema(tool: Any) -> str:
+    """
+    Materialize the full input schema for a single tool on demand.
+    summarize_tools only ships "- name: description" to the LLM; this is the
+    second phase of discovery, used when a plan actually references the tool.
+    """
+    schema = getattr(tool, "inputSchema", None) or getattr(tool, "parameters", None)
+    description = getattr(tool, "description", "No description provided.")
+    if not schema:
+        return f"- {tool.name}: {description}"
+    return f"- {tool.name}: {description}\n  schema: {json.dumps(schema)}"
+
+
+def filter_tools_by_hint(tools: List[Any], hint: Optional[str] = None) -> List[Any]:
+    """
+    If tool_hint is provided (e.g., 'search_documents'),
+    try to match it exactly or fuzzily with available tool names.
+    """
+    if not hint:
+        return tools
+
+    hint_lower = hint.lower()
+    filtered = [tool for tool in tools if hint_lower in tool.name.lower()]
+    return filtered if filtered else tools
+
+
+def get_tool_map(tools: List[Any]) -> Dict[str, Any]:
+    """
+    Return a dict of tool_name → tool object for fast lookup
+    """
+    return {tool.name: tool for tool in tools}
+
+def tool_expects_input(self, tool_name: str) -> bool:
+    tool = next((t for t in self.tools if t.name == tool_name), None)
+    if not tool or not hasattr(tool, 'parameters') or not isinstance(tool.parameters, dict):
+        return False
+    # If the top-level parameter is just 'input', we assume wrapping is required
+    return list(tool.parameters.keys()) == ['input']
+
+
+@functools.lru_cache(maxsize=None)
+def load_prompt(path: str) -> str:
+    """Prompt templates are static, so each file is read once per process."""
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()